@@ -15,11 +15,8 @@ import csv
 from pathlib import Path
 
 BASE_DIR = Path(__file__).parent
-EXCLUDED_DIRS = {
-    'APPLI:SCRIPT aliexpress', 'scripts', 'config', 'images', 'page_html', 
-    'upload_cloudflare', 'sauv', 'CSV', '__pycache__', '.git', 'node_modules',
-    'upload youtube'
-}
+# Dossiers à exclure lors de la détection des langues (partagé entre scripts)
+from project_dirs import EXCLUDED_DIRS
 
 def get_domain_from_csv(lang_dir):
     """Récupère le domaine depuis translations.csv."""
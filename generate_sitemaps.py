@@ -13,65 +13,117 @@ Usage:
 """
 
 import csv
+import functools
+import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
 from urllib.parse import urlparse
 
 BASE_DIR = Path(__file__).parent
 
-# Dossiers à exclure lors de la détection des langues
-EXCLUDED_DIRS = {
-    'APPLI:SCRIPT aliexpress', 'scripts', 'config', 'images', 'page_html', 
-    'upload_cloudflare', 'sauv', 'CSV', '__pycache__', '.git', 'node_modules'
-}
+# Date du jour calculée une seule fois au chargement du module
+# (évite de repayer strftime à chaque appel)
+_TODAY = date.today().isoformat()
 
+# Gabarit d'une entrée <url> : un seul format_map par page au lieu de
+# ~6 append de petites chaînes dans une liste
+URL_TMPL = (
+    '  <url>\n'
+    '    <loc>{url}</loc>\n'
+    '    <lastmod>{lastmod}</lastmod>\n'
+    '    <changefreq>{changefreq}</changefreq>\n'
+    '    <priority>{priority}</priority>\n'
+    '  </url>\n'
+)
+
+def write_urlset(pages, path):
+    """Écrit un sitemap <urlset> directement dans un fichier.
+
+    Écriture en streaming : on ne construit jamais le document complet en
+    mémoire (la mémoire reste constante quel que soit le nombre de pages).
+    """
+    with open(path, 'w', encoding='utf-8', buffering=1 << 16) as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for page in pages:
+            f.write(URL_TMPL.format_map(page))
+        f.write('</urlset>')
+
+# Valide et découpe une valeur de domaine en une seule passe : rejette les
+# formules ('=...') et commentaires ('#...'), capture le schéma éventuel et
+# ignore les '/' finaux
+_DOMAIN_RE = re.compile(r'^(?![=#])(https?://)?(.+?)/*$')
+
+def clean_domain(value):
+    """Nettoie une valeur de domaine ; retourne None si elle est invalide."""
+    m = _DOMAIN_RE.match(value)
+    if not m:
+        return None
+    return (m.group(1) or 'https://') + m.group(2)
+
+# Dossiers à exclure lors de la détection des langues (partagé entre scripts)
+from project_dirs import EXCLUDED_DIRS
+
+@functools.lru_cache(maxsize=None)
 def find_language_directories():
-    """Trouve automatiquement tous les dossiers de langue."""
+    """Trouve automatiquement tous les dossiers de langue.
+
+    Le résultat est mémoïsé : l'arborescence n'est parcourue qu'une seule fois par run.
+    """
     lang_dirs = []
     for item in BASE_DIR.iterdir():
-        if (item.is_dir() and 
-            not item.name.startswith('.') and 
-            item.name not in EXCLUDED_DIRS and
-            (item / 'index.html').exists() and 
-            (item / 'translations.csv').exists()):
-            lang_dirs.append(item)
+        if (item.is_dir() and
+            not item.name.startswith('.') and
+            item.name not in EXCLUDED_DIRS):
+            # Un seul readdir pour vérifier les deux fichiers requis,
+            # au lieu de deux stat() par dossier candidat
+            try:
+                with os.scandir(item) as it:
+                    names = {entry.name for entry in it}
+            except OSError:
+                continue
+            if 'index.html' in names and 'translations.csv' in names:
+                lang_dirs.append(item)
     return sorted(lang_dirs, key=lambda x: x.name.lower())
 
+@functools.lru_cache(maxsize=None)
 def load_domain_from_csv(lang_dir):
-    """Charge le domaine depuis translations.csv d'une langue."""
+    """Charge le domaine depuis translations.csv d'une langue (mémoïsé par dossier)."""
     translations_csv = lang_dir / 'translations.csv'
     if not translations_csv.exists():
         return None
     
     try:
         with open(translations_csv, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
+            # csv.reader (tuples) au lieu de DictReader : pas de dict alloué par ligne,
+            # on s'arrête dès que la ligne 'site.domain' est trouvée
+            reader = csv.reader(f)
+            headers = next(reader, [])
             for row in reader:
-                key = row.get('key', '').strip()
-                if key == 'site.domain':
-                    # Chercher dans toutes les colonnes possibles
-                    domain = None
-                    for col in row.keys():
-                        if col != 'key' and col != 'description':
-                            value = row.get(col, '').strip()
-                            if value and not value.startswith('=') and not value.startswith('#'):
-                                domain = value
-                                break
-                    
-                    if domain:
-                        # Nettoyer le domaine
-                        domain = domain.rstrip('/')
-                        if not domain.startswith('http'):
-                            domain = f'https://{domain}'
-                        return domain
+                if row and row[0].strip() == 'site.domain':
+                    # Chercher dans toutes les colonnes possibles (sauf 'description')
+                    for i, value in enumerate(row[1:], start=1):
+                        if i < len(headers) and headers[i] == 'description':
+                            continue
+                        domain = clean_domain(value.strip())
+                        if domain:
+                            return domain
+                    break
     except Exception as e:
         print(f"  ⚠️  Erreur lors de la lecture du CSV: {e}")
-    
+
     return None
 
+@functools.lru_cache(maxsize=None)
 def get_base_domain():
-    """Trouve le domaine de base en cherchant dans tous les dossiers de langue."""
+    """Trouve le domaine de base en cherchant dans tous les dossiers de langue.
+
+    Mémoïsé : les CSV ne sont relus qu'une seule fois, même si la fonction
+    est appelée pour chaque langue.
+    """
     lang_dirs = find_language_directories()
     for lang_dir in lang_dirs:
         domain = load_domain_from_csv(lang_dir)
@@ -83,36 +135,63 @@ def get_base_domain():
     if root_translations.exists():
         try:
             with open(root_translations, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
+                reader = csv.reader(f)
+                headers = next(reader, [])
                 for row in reader:
-                    key = row.get('key', '').strip()
-                    if key == 'site.domain':
-                        for col in row.keys():
-                            if col != 'key' and col != 'description':
-                                value = row.get(col, '').strip()
-                                if value and not value.startswith('=') and not value.startswith('#'):
-                                    domain = value.rstrip('/')
-                                    if not domain.startswith('http'):
-                                        domain = f'https://{domain}'
-                                    return domain
+                    if row and row[0].strip() == 'site.domain':
+                        for i, value in enumerate(row[1:], start=1):
+                            if i < len(headers) and headers[i] == 'description':
+                                continue
+                            domain = clean_domain(value.strip())
+                            if domain:
+                                return domain
+                        break
         except:
             pass
     
     # Fallback par défaut
     return 'https://www.senseofthailand.com'
 
+def scan_html_files(directory, prefix=None, exclude_index=False):
+    """Liste les fichiers HTML d'un dossier via os.scandir.
+
+    Les DirEntry mettent en cache les infos stat (mtime) : un seul appel
+    système par fichier au lieu de exists() + stat() par page.
+    Retourne les entrées triées par nom.
+    """
+    entries = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not entry.name.endswith('.html') or not entry.is_file():
+                continue
+            if exclude_index and entry.name == 'index.html':
+                continue
+            if prefix and not entry.name.startswith(prefix):
+                continue
+            entries.append(entry)
+    entries.sort(key=lambda e: e.name)
+    return entries
+
+def format_mtime(mtime):
+    """Formate un timestamp de modification en date YYYY-MM-DD.
+
+    Formatage direct par f-string : bien plus rapide que strftime
+    (pas de parsing du format ni de lookup de locale) par fichier.
+    """
+    tm = time.localtime(mtime)
+    return f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d}"
+
 def get_lastmod_date(file_path):
     """Récupère la date de modification d'un fichier."""
-    if file_path.exists():
-        mtime = file_path.stat().st_mtime
-        return datetime.fromtimestamp(mtime).strftime('%Y-%m-%d')
-    return datetime.now().strftime('%Y-%m-%d')
+    try:
+        return format_mtime(file_path.stat().st_mtime)
+    except FileNotFoundError:
+        return _TODAY
 
-def find_html_pages(lang_dir, lang_code):
+def find_html_pages(lang_dir, lang_code, base_domain):
     """Trouve toutes les pages HTML d'une langue."""
     pages = []
-    base_domain = get_base_domain()
-    
+
     # Index de la langue
     index_file = lang_dir / 'index.html'
     if index_file.exists():
@@ -126,72 +205,70 @@ def find_html_pages(lang_dir, lang_code):
     # Pages catégories (sans extension .html car Cloudflare Pages les sert sans)
     categories_dir = lang_dir / 'page_html' / 'categories'
     if categories_dir.exists():
-        for html_file in sorted(categories_dir.glob('*.html')):
-            if html_file.name != 'index.html':  # Exclure les index.html dans les catégories
-                # Enlever l'extension .html pour l'URL
-                url_name = html_file.stem
-                pages.append({
-                    'url': f'{base_domain}/{lang_code}/page_html/categories/{url_name}',
-                    'lastmod': get_lastmod_date(html_file),
-                    'priority': '0.8',
-                    'changefreq': 'weekly'
-                })
-    
+        for entry in scan_html_files(categories_dir, exclude_index=True):
+            # Enlever l'extension .html pour l'URL
+            url_name = entry.name[:-5]
+            pages.append({
+                'url': f'{base_domain}/{lang_code}/page_html/categories/{url_name}',
+                'lastmod': format_mtime(entry.stat().st_mtime),
+                'priority': '0.8',
+                'changefreq': 'weekly'
+            })
+
     # Pages produits (sans extension .html)
     products_dir = lang_dir / 'page_html' / 'products'
     if products_dir.exists():
-        for html_file in sorted(products_dir.glob('produit-*.html')):
+        for entry in scan_html_files(products_dir, prefix='produit-'):
             # Enlever l'extension .html pour l'URL
-            url_name = html_file.stem
+            url_name = entry.name[:-5]
             pages.append({
                 'url': f'{base_domain}/{lang_code}/page_html/products/{url_name}',
-                'lastmod': get_lastmod_date(html_file),
+                'lastmod': format_mtime(entry.stat().st_mtime),
                 'priority': '0.7',
                 'changefreq': 'monthly'
             })
-    
+
     # Pages légales (sans extension .html)
     legal_dir = lang_dir / 'page_html' / 'legal'
     if legal_dir.exists():
-        for html_file in sorted(legal_dir.glob('*.html')):
+        for entry in scan_html_files(legal_dir):
             # Enlever l'extension .html pour l'URL
-            url_name = html_file.stem
+            url_name = entry.name[:-5]
             pages.append({
                 'url': f'{base_domain}/{lang_code}/page_html/legal/{url_name}',
-                'lastmod': get_lastmod_date(html_file),
+                'lastmod': format_mtime(entry.stat().st_mtime),
                 'priority': '0.5',
                 'changefreq': 'monthly'
             })
-    
+
     return pages
 
-def generate_language_sitemap(lang_dir, lang_code):
-    """Génère un sitemap XML pour une langue spécifique."""
-    pages = find_html_pages(lang_dir, lang_code)
-    
+def process_language(lang_dir, base_domain):
+    """Génère et écrit le sitemap d'une langue (worker du pool de threads).
+
+    Retourne (lang_code, nom_du_fichier, nombre_de_pages), ou un nom None
+    si aucune page n'a été trouvée.
+    """
+    lang_code = lang_dir.name.lower()
+    pages = find_html_pages(lang_dir, lang_code, base_domain)
+
     if not pages:
         print(f"  ⚠️  Aucune page trouvée pour {lang_code}")
-        return None
-    
-    sitemap_content = ['<?xml version="1.0" encoding="UTF-8"?>']
-    sitemap_content.append('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
-    
-    for page in pages:
-        sitemap_content.append('  <url>')
-        sitemap_content.append(f'    <loc>{page["url"]}</loc>')
-        sitemap_content.append(f'    <lastmod>{page["lastmod"]}</lastmod>')
-        sitemap_content.append(f'    <changefreq>{page["changefreq"]}</changefreq>')
-        sitemap_content.append(f'    <priority>{page["priority"]}</priority>')
-        sitemap_content.append('  </url>')
-    
-    sitemap_content.append('</urlset>')
-    
-    return '\n'.join(sitemap_content)
+        return lang_code, None, 0
 
-def generate_sitemap_index(lang_codes):
+    # Sauvegarder le sitemap à la racine (pour Google Search Console)
+    sitemap_file = BASE_DIR / f'sitemap-{lang_code}.xml'
+    write_urlset(pages, sitemap_file)
+
+    # Créer aussi un sitemap.xml dans le dossier de langue pour le footer
+    lang_sitemap_file = lang_dir / 'sitemap.xml'
+    write_urlset(pages, lang_sitemap_file)
+
+    return lang_code, sitemap_file.name, len(pages)
+
+def generate_sitemap_index(lang_codes, base_domain):
     """Génère le sitemap index qui référence tous les sitemaps de langue."""
-    base_domain = get_base_domain()
-    today = datetime.now().strftime('%Y-%m-%d')
+    today = _TODAY
     
     sitemap_content = ['<?xml version="1.0" encoding="UTF-8"?>']
     sitemap_content.append('<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
@@ -283,8 +360,7 @@ def main():
         
         # Générer le sitemap pour la racine (en)
         root_pages = []
-        base_domain = get_base_domain()
-        
+
         # Index de la racine
         root_pages.append({
             'url': f'{base_domain}/',
@@ -296,65 +372,50 @@ def main():
         # Pages catégories de la racine (sans extension .html)
         root_categories_dir = BASE_DIR / 'page_html' / 'categories'
         if root_categories_dir.exists():
-            for html_file in sorted(root_categories_dir.glob('*.html')):
-                if html_file.name != 'index.html':
-                    # Enlever l'extension .html pour l'URL
-                    url_name = html_file.stem
-                    root_pages.append({
-                        'url': f'{base_domain}/page_html/categories/{url_name}',
-                        'lastmod': get_lastmod_date(html_file),
-                        'priority': '0.8',
-                        'changefreq': 'weekly'
-                    })
-        
+            for entry in scan_html_files(root_categories_dir, exclude_index=True):
+                # Enlever l'extension .html pour l'URL
+                url_name = entry.name[:-5]
+                root_pages.append({
+                    'url': f'{base_domain}/page_html/categories/{url_name}',
+                    'lastmod': format_mtime(entry.stat().st_mtime),
+                    'priority': '0.8',
+                    'changefreq': 'weekly'
+                })
+
         # Pages produits de la racine (sans extension .html)
         root_products_dir = BASE_DIR / 'page_html' / 'products'
         if root_products_dir.exists():
-            for html_file in sorted(root_products_dir.glob('produit-*.html')):
+            for entry in scan_html_files(root_products_dir, prefix='produit-'):
                 # Enlever l'extension .html pour l'URL
-                url_name = html_file.stem
+                url_name = entry.name[:-5]
                 root_pages.append({
                     'url': f'{base_domain}/page_html/products/{url_name}',
-                    'lastmod': get_lastmod_date(html_file),
+                    'lastmod': format_mtime(entry.stat().st_mtime),
                     'priority': '0.7',
                     'changefreq': 'monthly'
                 })
-        
+
         # Pages légales de la racine (sans extension .html)
         root_legal_dir = BASE_DIR / 'page_html' / 'legal'
         if root_legal_dir.exists():
-            for html_file in sorted(root_legal_dir.glob('*.html')):
+            for entry in scan_html_files(root_legal_dir):
                 # Enlever l'extension .html pour l'URL
-                url_name = html_file.stem
+                url_name = entry.name[:-5]
                 root_pages.append({
                     'url': f'{base_domain}/page_html/legal/{url_name}',
-                    'lastmod': get_lastmod_date(html_file),
+                    'lastmod': format_mtime(entry.stat().st_mtime),
                     'priority': '0.5',
                     'changefreq': 'monthly'
                 })
         
         if root_pages:
-            sitemap_content = ['<?xml version="1.0" encoding="UTF-8"?>']
-            sitemap_content.append('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
-            
-            for page in root_pages:
-                sitemap_content.append('  <url>')
-                sitemap_content.append(f'    <loc>{page["url"]}</loc>')
-                sitemap_content.append(f'    <lastmod>{page["lastmod"]}</lastmod>')
-                sitemap_content.append(f'    <changefreq>{page["changefreq"]}</changefreq>')
-                sitemap_content.append(f'    <priority>{page["priority"]}</priority>')
-                sitemap_content.append('  </url>')
-            
-            sitemap_content.append('</urlset>')
-            sitemap_en_content = '\n'.join(sitemap_content)
-            
             sitemap_file = BASE_DIR / 'sitemap-en.xml'
-            sitemap_file.write_text(sitemap_en_content, encoding='utf-8')
-            
+            write_urlset(root_pages, sitemap_file)
+
             # Note: Le sitemap.xml à la racine sera créé plus tard comme sitemap index
             # qui référence tous les sitemaps de langue (c'est mieux pour Google)
-            
-            page_count = sitemap_en_content.count('<url>')
+
+            page_count = len(root_pages)
             print(f"  ✅ {page_count} page(s) ajoutée(s)")
             print(f"  📁 Fichier: {sitemap_file.name} (racine)")
             print(f"  💡 Le sitemap.xml à la racine sera le sitemap index (généré plus tard)")
@@ -365,26 +426,24 @@ def main():
         print("📝 Génération des sitemaps par langue...")
         print("-" * 70)
     
-    # 4. Générer un sitemap pour chaque langue
+    # 4. Générer un sitemap pour chaque langue (en parallèle : le travail est
+    # indépendant par langue et dominé par les appels système / écritures)
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(16, len(lang_dirs))) as executor:
+        futures = [executor.submit(process_language, lang_dir, base_domain) for lang_dir in lang_dirs]
+        for future in as_completed(futures):
+            lang_code, file_name, page_count = future.result()
+            results[lang_code] = (file_name, page_count)
+
+    # Afficher les résultats dans l'ordre des langues (déterministe)
     for lang_dir in lang_dirs:
         lang_code = lang_dir.name.lower()
         print(f"\n📄 Génération de sitemap-{lang_code}.xml...")
-        
-        sitemap_content = generate_language_sitemap(lang_dir, lang_code)
-        
-        if sitemap_content:
-            # Sauvegarder le sitemap à la racine (pour Google Search Console)
-            sitemap_file = BASE_DIR / f'sitemap-{lang_code}.xml'
-            sitemap_file.write_text(sitemap_content, encoding='utf-8')
-            
-            # Créer aussi un sitemap.xml dans le dossier de langue pour le footer
-            lang_sitemap_file = lang_dir / 'sitemap.xml'
-            lang_sitemap_file.write_text(sitemap_content, encoding='utf-8')
-            
-            # Compter les pages
-            page_count = sitemap_content.count('<url>')
+
+        file_name, page_count = results[lang_code]
+        if file_name:
             print(f"  ✅ {page_count} page(s) ajoutée(s)")
-            print(f"  📁 Fichier: {sitemap_file.name} (racine)")
+            print(f"  📁 Fichier: {file_name} (racine)")
             print(f"  📁 Fichier: {lang_code}/sitemap.xml (pour le footer)")
             generated_sitemaps.append(lang_code)
         else:
@@ -395,7 +454,7 @@ def main():
     
     # 5. Générer le sitemap index à la racine
     print("\n📋 Génération du sitemap index (racine)...")
-    sitemap_index_content = generate_sitemap_index(generated_sitemaps)
+    sitemap_index_content = generate_sitemap_index(generated_sitemaps, base_domain)
     
     sitemap_index_file = BASE_DIR / 'sitemap.xml'
     sitemap_index_file.write_text(sitemap_index_content, encoding='utf-8')
@@ -422,25 +481,24 @@ def main():
         
         root_categories_dir = BASE_DIR / 'page_html' / 'categories'
         if root_categories_dir.exists():
-            for html_file in sorted(root_categories_dir.glob('*.html')):
-                if html_file.name != 'index.html':
-                    # Enlever l'extension .html pour l'URL
-                    url_name = html_file.stem
-                    all_pages.append({
-                        'url': f'{base_domain}/page_html/categories/{url_name}',
-                        'lastmod': get_lastmod_date(html_file),
-                        'priority': '0.8',
-                        'changefreq': 'weekly'
-                    })
-        
+            for entry in scan_html_files(root_categories_dir, exclude_index=True):
+                # Enlever l'extension .html pour l'URL
+                url_name = entry.name[:-5]
+                all_pages.append({
+                    'url': f'{base_domain}/page_html/categories/{url_name}',
+                    'lastmod': format_mtime(entry.stat().st_mtime),
+                    'priority': '0.8',
+                    'changefreq': 'weekly'
+                })
+
         root_products_dir = BASE_DIR / 'page_html' / 'products'
         if root_products_dir.exists():
-            for html_file in sorted(root_products_dir.glob('produit-*.html')):
+            for entry in scan_html_files(root_products_dir, prefix='produit-'):
                 # Enlever l'extension .html pour l'URL
-                url_name = html_file.stem
+                url_name = entry.name[:-5]
                 all_pages.append({
                     'url': f'{base_domain}/page_html/products/{url_name}',
-                    'lastmod': get_lastmod_date(html_file),
+                    'lastmod': format_mtime(entry.stat().st_mtime),
                     'priority': '0.7',
                     'changefreq': 'monthly'
                 })
@@ -448,25 +506,13 @@ def main():
     # Ajouter les pages de chaque langue
     for lang_dir in lang_dirs:
         lang_code = lang_dir.name.lower()
-        lang_pages = find_html_pages(lang_dir, lang_code)
+        lang_pages = find_html_pages(lang_dir, lang_code, base_domain)
         all_pages.extend(lang_pages)
     
     # Générer le sitemap combiné si on a moins de 50000 URLs (limite Google)
     if len(all_pages) > 0 and len(all_pages) < 50000:
-        sitemap_all_content = ['<?xml version="1.0" encoding="UTF-8"?>']
-        sitemap_all_content.append('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">')
-        
-        for page in all_pages:
-            sitemap_all_content.append('  <url>')
-            sitemap_all_content.append(f'    <loc>{page["url"]}</loc>')
-            sitemap_all_content.append(f'    <lastmod>{page["lastmod"]}</lastmod>')
-            sitemap_all_content.append(f'    <changefreq>{page["changefreq"]}</changefreq>')
-            sitemap_all_content.append(f'    <priority>{page["priority"]}</priority>')
-            sitemap_all_content.append('  </url>')
-        
-        sitemap_all_content.append('</urlset>')
         sitemap_all_file = BASE_DIR / 'sitemap-all.xml'
-        sitemap_all_file.write_text('\n'.join(sitemap_all_content), encoding='utf-8')
+        write_urlset(all_pages, sitemap_all_file)
         
         print(f"  ✅ Sitemap combiné généré avec {len(all_pages)} URL(s)")
         print(f"  📁 Fichier: {sitemap_all_file.name}")
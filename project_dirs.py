@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+Constantes partagées sur la structure du projet.
+
+EXCLUDED_DIRS liste les dossiers à ignorer lors de la détection des langues.
+Un frozenset : test d'appartenance O(1) et une seule définition à maintenir
+au lieu d'une copie par script.
+"""
+
+EXCLUDED_DIRS = frozenset({
+    'APPLI:SCRIPT aliexpress', 'scripts', 'config', 'images', 'page_html',
+    'upload_cloudflare', 'sauv', 'CSV', '__pycache__', '.git', 'node_modules',
+    'upload youtube'
+})
@@ -12,10 +12,15 @@ Script pour automatiser l'upload de vidéos YouTube multilingue avec gestion du
 import os
 import sys
 import csv
+import functools
+import html
+import itertools
 import re
 import json
+import time
 import argparse
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime, date
 from google.oauth2.credentials import Credentials
@@ -25,6 +30,13 @@ from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 from googleapiclient.errors import HttpError
 
+# orjson (parseur/sérialiseur C, ~3-10x plus rapide) si disponible,
+# sinon retour au json de la stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Chemins
 SCRIPT_DIR = Path(__file__).parent  # Dossier upload youtube
 CURRENT_LANG_DIR = SCRIPT_DIR.parent  # Dossier parent (peut être ROOT_DIR ou un dossier de langue)
@@ -49,6 +61,18 @@ CONFIG_FILE = SCRIPT_DIR / 'upload_config.json'  # Fichier de configuration des
 # Scopes nécessaires pour uploader des vidéos
 SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
 
+# Diagnostics détaillés par produit (activés via --verbose)
+VERBOSE = False
+
+def vprint(*messages):
+    """Affiche les diagnostics si --verbose, en un seul write groupé.
+
+    Chaque print() déclenche un flush du terminal ; grouper les lignes en
+    un seul sys.stdout.write réduit les syscalls dans la boucle d'upload.
+    """
+    if VERBOSE:
+        sys.stdout.write('\n'.join(str(m) for m in messages) + '\n')
+
 # Quota YouTube par jour (peut être modifié via variable d'environnement YOUTUBE_DAILY_QUOTA)
 # Par défaut: pas de limite (None)
 # Pour définir une limite, exportez: export YOUTUBE_DAILY_QUOTA=10
@@ -119,8 +143,9 @@ def filter_language_dirs(lang_dirs, selected_languages):
     
     return filtered
 
+@functools.lru_cache(maxsize=None)
 def get_site_url(lang_dir):
-    """Récupère l'URL du site depuis translations.csv d'une langue."""
+    """Récupère l'URL du site depuis translations.csv d'une langue (mémoïsé)."""
     # Si c'est le dossier principal, chercher translations.csv à la racine
     translations_csv = lang_dir / 'translations.csv'
     if translations_csv.exists():
@@ -181,29 +206,54 @@ def get_authenticated_service():
     
     return build('youtube', 'v3', credentials=credentials)
 
+def list_product_folders():
+    """Dresse la carte {id produit: chemin du dossier} en un seul scandir de IMAGES_DIR.
+
+    Un seul readdir pour tout le catalogue au lieu d'un scandir raté par
+    produit sans dossier ; le lookup par candidat devient O(1) en mémoire.
+    Les chemins sont des str bruts : pas d'objet Path alloué par dossier
+    (seule la vidéo trouvée est convertie en Path, au moment du hit).
+    """
+    try:
+        with os.scandir(IMAGES_DIR) as it:
+            return {entry.name: entry.path for entry in it if entry.is_dir()}
+    except OSError:
+        return {}
+
+# Extensions vidéo reconnues (comparées en minuscules)
+VIDEO_EXTENSIONS = ('.mp4', '.webm', '.mov', '.avi', '.mkv')
+
 def find_video_in_folder(folder_path):
-    """Trouve la première vidéo dans un dossier."""
-    if not folder_path.exists() or not folder_path.is_dir():
+    """Trouve la première vidéo dans un dossier (chemin str ou Path).
+
+    Un seul passage os.scandir au lieu de 10 glob (2 par extension) :
+    chaque glob recompilait un motif fnmatch et relisait tout le dossier.
+    """
+    try:
+        it = os.scandir(folder_path)
+    except OSError:
+        # Dossier inexistant (ou pas un dossier)
         return None
-    
-    video_extensions = ['.mp4', '.webm', '.mov', '.avi', '.mkv']
-    videos = []
-    for ext in video_extensions:
-        videos.extend(list(folder_path.glob(f'*{ext}')))
-        videos.extend(list(folder_path.glob(f'*{ext.upper()}')))
-    
-    if videos:
-        return videos[0]
+
+    with it:
+        for entry in it:
+            if entry.is_file() and entry.name.lower().endswith(VIDEO_EXTENSIONS):
+                return Path(entry.path)
     return None
 
+# Regex compilées une seule fois (clean_text est appelé pour chaque produit)
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+
 def clean_text(text):
     """Nettoie le texte en enlevant les balises HTML et en limitant la longueur."""
     if not text:
         return ""
-    
-    text = re.sub(r'<[^>]+>', '', str(text))
-    text = text.replace('&nbsp;', ' ').replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>')
-    text = re.sub(r'\s+', ' ', text).strip()
+
+    text = _TAG_RE.sub('', str(text))
+    # html.unescape gère toutes les entités (&nbsp;, &amp;, &lt;...) en une passe
+    text = html.unescape(text)
+    text = _WS_RE.sub(' ', text).strip()
     return text
 
 def build_description(product_id, description_short, site_url, lang_code):
@@ -230,6 +280,8 @@ def load_tracking():
     """Charge le fichier de tracking des uploads."""
     if TRACKING_FILE.exists():
         try:
+            if orjson is not None:
+                return orjson.loads(TRACKING_FILE.read_bytes())
             with open(TRACKING_FILE, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
@@ -240,8 +292,11 @@ def load_tracking():
 def save_tracking(tracking_data):
     """Sauvegarde le fichier de tracking."""
     try:
-        with open(TRACKING_FILE, 'w', encoding='utf-8') as f:
-            json.dump(tracking_data, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            TRACKING_FILE.write_bytes(orjson.dumps(tracking_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(TRACKING_FILE, 'w', encoding='utf-8') as f:
+                json.dump(tracking_data, f, indent=2, ensure_ascii=False)
         return True
     except Exception as e:
         print(f"❌ Erreur lors de la sauvegarde du tracking: {e}")
@@ -261,8 +316,10 @@ def can_upload_today(tracking_data):
 
 def record_upload(tracking_data, lang_code, product_id, youtube_url):
     """Enregistre un upload dans le tracking."""
-    today = date.today().isoformat()
-    
+    # Un seul appel horloge : la date du jour est dérivée du datetime
+    now = datetime.now()
+    today = now.date().isoformat()
+
     # Initialiser les structures si nécessaire
     if 'daily_uploads' not in tracking_data:
         tracking_data['daily_uploads'] = {}
@@ -279,7 +336,7 @@ def record_upload(tracking_data, lang_code, product_id, youtube_url):
         'product_id': product_id,
         'youtube_url': youtube_url,
         'upload_date': today,
-        'upload_datetime': datetime.now().isoformat()
+        'upload_datetime': now.isoformat()
     }
 
 def is_already_uploaded(tracking_data, lang_code, product_id):
@@ -291,28 +348,24 @@ def check_remaining_videos(tracking_data, lang_dirs=None):
     """Compte le nombre de vidéos restantes à uploader."""
     if lang_dirs is None:
         lang_dirs = get_language_dirs()
-    
+
     total_remaining = 0
-    
+    # Hoisté hors de la boucle : un seul accès au dict des uploads, et un
+    # seul scandir de IMAGES_DIR (commun à toutes les langues)
+    uploads = tracking_data.get('uploads', {})
+    product_dirs = list_product_folders()
+
     for lang_dir in lang_dirs:
         lang_code = get_lang_code_from_dir(lang_dir)
-        df = load_csv_data(lang_dir)
-        if df is None:
-            continue
-        
-        # Chercher la colonne ID
-        id_col = 'id' if 'id' in df.columns else 'product_id'
-        if id_col not in df.columns:
-            continue
-        
-        for _, row in df.iterrows():
-            product_id = str(row.get(id_col, ''))
-            if not product_id:
-                continue
-            
-            if not is_already_uploaded(tracking_data, lang_code, product_id):
-                product_folder = IMAGES_DIR / product_id
-                if find_video_in_folder(product_folder):
+
+        # Streaming : seule la colonne ID est lue, le catalogue complet
+        # n'est jamais matérialisé en mémoire
+        key_prefix = lang_code + '_'
+        for product_id in iter_product_ids(lang_dir):
+            # Tester l'appartenance avant de toucher au filesystem
+            if key_prefix + product_id not in uploads:
+                product_folder = product_dirs.get(product_id)
+                if product_folder and find_video_in_folder(product_folder):
                     total_remaining += 1
     
     return total_remaining
@@ -343,8 +396,8 @@ def upload_video(youtube, video_file, title, description, privacy_status='public
     )
     
     try:
-        print(f"  📤 Upload en cours...")
-        
+        vprint("  📤 Upload en cours...")
+
         insert_request = youtube.videos().insert(
             part=','.join(body.keys()),
             body=body,
@@ -367,7 +420,7 @@ def upload_video(youtube, video_file, title, description, privacy_status='public
                         print(f"  ❌ Erreur lors de l'upload: {response}")
                         return None
                 else:
-                    if status:
+                    if status and VERBOSE:
                         progress = int(status.progress() * 100)
                         print(f"  📊 Progression: {progress}%", end='\r', flush=True)
             except HttpError as e:
@@ -375,7 +428,10 @@ def upload_video(youtube, video_file, title, description, privacy_status='public
                     error = f"Erreur {e.resp.status}: {e.content}"
                     retry += 1
                     if retry < 5:
-                        print(f"\n  ⚠️  Erreur temporaire, nouvelle tentative ({retry}/5)...")
+                        # Backoff exponentiel : laisser le temps au serveur de se rétablir
+                        wait = 2 ** retry
+                        print(f"\n  ⚠️  Erreur temporaire, nouvelle tentative ({retry}/5) dans {wait}s...")
+                        time.sleep(wait)
                         continue
                     else:
                         print(f"\n  ❌ Erreur après {retry} tentatives: {error}")
@@ -394,20 +450,59 @@ def upload_video(youtube, video_file, title, description, privacy_status='public
         return None
 
 def load_csv_data(lang_dir):
-    """Charge les données du CSV d'une langue."""
+    """Charge les données du CSV d'une langue.
+
+    Retourne (headers, rows) où rows est une liste de dicts, ou None si le
+    CSV est introuvable. Le module csv de la stdlib suffit largement ici :
+    pas d'import pandas (~500 ms au démarrage) ni de DataFrame à allouer.
+    """
     # Si c'est le dossier principal, chercher CSV/all_products.csv à la racine
     csv_file = lang_dir / 'CSV' / 'all_products.csv'
     if not csv_file.exists():
         return None
-    
+
     try:
-        df = pd.read_csv(csv_file)
-        return df
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            # restval='' : les cellules manquantes arrivent directement en
+            # chaîne vide, pas de passe de normalisation après chargement
+            reader = csv.DictReader(f, restval='')
+            headers = list(reader.fieldnames or [])
+            rows = list(reader)
+        return headers, rows
     except Exception as e:
         print(f"❌ Erreur lors de la lecture du CSV: {e}")
         return None
 
-def save_csv_data(lang_dir, df):
+def iter_product_ids(lang_dir):
+    """Itère les IDs produits du CSV d'une langue en streaming.
+
+    Mémoire constante quel que soit la taille du catalogue : csv.reader
+    (tuples) ligne à ligne, seule la colonne ID est extraite. À utiliser
+    quand on n'a pas besoin des lignes complètes.
+    """
+    csv_file = lang_dir / 'CSV' / 'all_products.csv'
+    if not csv_file.exists():
+        return
+
+    try:
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            headers = next(reader, [])
+            for id_col in ('id', 'product_id'):
+                if id_col in headers:
+                    id_i = headers.index(id_col)
+                    break
+            else:
+                return
+            for row in reader:
+                if id_i < len(row):
+                    product_id = row[id_i].strip()
+                    if product_id:
+                        yield product_id
+    except Exception as e:
+        print(f"❌ Erreur lors de la lecture du CSV: {e}")
+
+def save_csv_data(lang_dir, headers, rows):
     """Sauvegarde les données dans le CSV d'une langue."""
     csv_file = lang_dir / 'CSV' / 'all_products.csv'
     try:
@@ -416,97 +511,200 @@ def save_csv_data(lang_dir, df):
         if csv_file.exists():
             import shutil
             shutil.copy2(csv_file, backup_file)
-        
-        # S'assurer que youtube_url est bien de type string
-        if 'youtube_url' in df.columns:
-            df['youtube_url'] = df['youtube_url'].fillna('').astype(str)
-            # Remplacer 'nan' par chaîne vide
-            df['youtube_url'] = df['youtube_url'].replace('nan', '')
-        
-        df.to_csv(csv_file, index=False, encoding='utf-8')
+
+        with open(csv_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=headers, restval='')
+            writer.writeheader()
+            writer.writerows(rows)
         return True
     except Exception as e:
         print(f"❌ Erreur lors de la sauvegarde du CSV: {e}")
         return False
 
-def get_product_metadata(df, product_id, lang_code):
-    """Récupère les métadonnées d'un produit depuis le CSV."""
+# Index id -> ligne par liste de lignes (évite un scan complet de la
+# colonne ID à chaque lookup de produit, soit O(N²) au total)
+_ID_INDEX_CACHE = {}
+
+def get_id_index(rows, id_col):
+    """Retourne (en le construisant une seule fois) l'index id -> ligne."""
+    index = _ID_INDEX_CACHE.get(id(rows))
+    if index is None:
+        index = {str(row.get(id_col) or '').strip(): row for row in rows}
+        _ID_INDEX_CACHE[id(rows)] = index
+    return index
+
+@functools.lru_cache(maxsize=None)
+def resolve_columns(headers_key, lang_code):
+    """Résout les colonnes (id, titre, description) pour un en-tête donné.
+
+    Les noms de colonnes ne changent pas entre deux appels sur le même CSV :
+    mémoïsé par (en-tête, langue) pour éviter ~8 tests d'appartenance par produit.
+    """
+    headers = headers_key
+
     # Chercher la colonne ID (peut être 'id' ou 'product_id')
-    id_col = 'id' if 'id' in df.columns else 'product_id'
-    
-    # Convertir product_id pour la comparaison (essayer int d'abord, puis string)
-    try:
-        product_id_int = int(product_id)
-        product_row = df[df[id_col] == product_id_int]
-    except (ValueError, TypeError):
-        product_id_str = str(product_id)
-        product_row = df[df[id_col].astype(str) == product_id_str]
-    
-    if product_row.empty:
-        # Essayer avec string si int a échoué
-        if 'product_id_int' in locals():
-            product_id_str = str(product_id)
-            product_row = df[df[id_col].astype(str) == product_id_str]
-    
-    if product_row.empty:
-        return None, None
-    
-    row = product_row.iloc[0]
-    
+    id_col = 'id' if 'id' in headers else 'product_id'
+
     # Chercher le titre dans la colonne appropriée
     # Priorité: titre_{lang_code} > titre > name_{lang_code} > name
     title_col = None
-    if f'titre_{lang_code}' in df.columns:
+    if f'titre_{lang_code}' in headers:
         title_col = f'titre_{lang_code}'
-    elif 'titre' in df.columns:
+    elif 'titre' in headers:
         title_col = 'titre'
-    elif f'name_{lang_code}' in df.columns:
+    elif f'name_{lang_code}' in headers:
         title_col = f'name_{lang_code}'
-    elif 'name' in df.columns:
+    elif 'name' in headers:
         title_col = 'name'
-    
-    if not title_col:
-        return None, None
-    
+
     # Chercher la description dans la colonne appropriée
     # Priorité: description_short_{lang_code} > description_short > description_{lang_code} > description
     desc_col = None
-    if f'description_short_{lang_code}' in df.columns:
+    if f'description_short_{lang_code}' in headers:
         desc_col = f'description_short_{lang_code}'
-    elif 'description_short' in df.columns:
+    elif 'description_short' in headers:
         desc_col = 'description_short'
-    elif f'description_{lang_code}' in df.columns:
+    elif f'description_{lang_code}' in headers:
         desc_col = f'description_{lang_code}'
-    elif 'description' in df.columns:
+    elif 'description' in headers:
         desc_col = 'description'
-    
+
+    return id_col, title_col, desc_col
+
+def journal_path(lang_code):
+    """Chemin du journal d'uploads d'une langue."""
+    return SCRIPT_DIR / f'uploads_{lang_code}.jsonl'
+
+def append_journal(lang_code, product_id, youtube_url):
+    """Journalise un upload en append-only (JSON par ligne).
+
+    Réécrire tout le CSV après chaque upload coûte O(lignes) par vidéo ;
+    on ajoute une ligne au journal (fsync pour survivre à un crash) et le
+    CSV n'est réécrit qu'une seule fois en fin de run.
+    """
+    with open(journal_path(lang_code), 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'id': product_id, 'url': youtube_url}) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+def apply_journal(lang_dir, lang_code, headers, rows):
+    """Reporte les entrées du journal dans le CSV puis supprime le journal.
+
+    Appelé au démarrage (reprise après crash) et en fin de run : une seule
+    réécriture du CSV quel que soit le nombre d'uploads.
+    """
+    path = journal_path(lang_code)
+    if not path.exists():
+        return
+
+    id_col = 'id' if 'id' in headers else 'product_id'
+    index = get_id_index(rows, id_col)
+    applied = 0
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                row = index.get(str(entry.get('id', '')))
+                if row is not None:
+                    row['youtube_url'] = entry.get('url', '')
+                    applied += 1
+    except Exception as e:
+        print(f"⚠️  Erreur lors de la lecture du journal: {e}")
+        return
+
+    if not applied or save_csv_data(lang_dir, headers, rows):
+        path.unlink()
+
+def get_product_metadata(headers, rows, product_id, lang_code):
+    """Récupère les métadonnées d'un produit depuis le CSV."""
+    id_col, title_col, desc_col = resolve_columns(tuple(headers), lang_code)
+
+    if not title_col:
+        return None, None
+
+    # Lookup O(1) dans l'index au lieu de parcourir toutes les lignes
+    row = get_id_index(rows, id_col).get(str(product_id))
+    if row is None:
+        return None, None
+
     # Récupérer le titre
-    title_raw = row.get(title_col, '')
-    if pd.isna(title_raw):
-        title_raw = ''
-    title = clean_text(str(title_raw))
-    
+    title = clean_text(row.get(title_col) or '')
+
     # Si pas de titre, retourner None pour ignorer cette vidéo
     if not title or len(title.strip()) == 0:
         return None, None
-    
+
     # Limiter le titre à 100 caractères
     if len(title) > 100:
         title = title[:97] + "..."
-    
+
     # Récupérer la description
-    if desc_col:
-        desc_raw = row.get(desc_col, '')
-        if pd.isna(desc_raw):
-            desc_raw = ''
-        description = str(desc_raw)
-    else:
-        description = ''
-    
+    description = (row.get(desc_col) or '') if desc_col else ''
+
     return title, description
 
+@dataclass
+class LangContext:
+    """Contexte pré-calculé d'une langue.
+
+    Tout ce dont la boucle d'upload a besoin (code, nom affiché, CSV chargé,
+    colonne ID, URL du site) est résolu une seule fois ici au lieu d'être
+    recalculé au fil de main().
+    """
+    lang_dir: Path
+    code: str
+    name: str
+    headers: list
+    rows: list
+    id_col: str
+    site_url: str
+
+def build_lang_context(lang_dir):
+    """Charge le CSV d'une langue et construit son contexte (None si échec)."""
+    code = get_lang_code_from_dir(lang_dir)
+
+    data = load_csv_data(lang_dir)
+    if data is None:
+        print(f"⚠️  Impossible de charger le CSV pour {code}")
+        return None
+    headers, rows = data
+
+    # Vérifier que la colonne youtube_url existe (les lignes sans la clé
+    # seront complétées par DictWriter via restval='' à la sauvegarde)
+    if 'youtube_url' not in headers:
+        headers.append('youtube_url')
+
+    # Chercher la colonne ID (peut être 'id' ou 'product_id')
+    id_col = 'id' if 'id' in headers else 'product_id'
+    if id_col not in headers:
+        print(f"⚠️  Colonne ID non trouvée dans le CSV (cherché 'id' ou 'product_id')")
+        return None
+
+    return LangContext(
+        lang_dir=lang_dir,
+        code=code,
+        name="Principal (EN)" if lang_dir == ROOT_DIR else code.upper(),
+        headers=headers,
+        rows=rows,
+        id_col=id_col,
+        site_url=get_site_url(lang_dir),
+    )
+
 def main():
     """Fonction principale."""
+    global VERBOSE
+    parser = argparse.ArgumentParser(
+        description="Upload automatique des vidéos produits sur YouTube")
+    parser.add_argument('--verbose', action='store_true',
+                        help="affiche les diagnostics détaillés par produit")
+    VERBOSE = parser.parse_args().verbose
+
     # Le script détecte automatiquement dans quel dossier il se trouve
     # et ne traite que cette langue
     
@@ -544,93 +742,100 @@ def main():
         print("   Pas de limite de quota définie")
         print()
     
-    # Afficher la langue traitée
+    # Construire le contexte de la langue traitée (une seule fois)
     lang_dir = lang_dirs[0]  # Il n'y a qu'une seule langue maintenant
-    lang_code = get_lang_code_from_dir(lang_dir)
-    lang_name = "Principal (EN)" if lang_dir == ROOT_DIR else lang_code.upper()
-    print(f"🌍 Langue: {lang_name}")
+    ctx = build_lang_context(lang_dir)
+    if ctx is None:
+        return
+    lang_code = ctx.code
+    print(f"🌍 Langue: {ctx.name}")
     print()
     
-    # Authentifier YouTube
-    print("🔐 Authentification YouTube...")
-    try:
-        youtube = get_authenticated_service()
-        print("✅ Authentification réussie")
-        print()
-    except Exception as e:
-        print(f"❌ Erreur lors de l'authentification: {e}")
-        sys.exit(1)
-    
     # Traiter uniquement cette langue
     total_uploaded = 0
     total_skipped = 0
     total_errors = 0
     
     # Boucle simplifiée (une seule langue)
-    lang_code = get_lang_code_from_dir(lang_dir)
-    lang_name = "Principal (EN)" if lang_dir == ROOT_DIR else lang_code.upper()
+    lang_name = ctx.name
+    headers, rows, id_col, site_url = ctx.headers, ctx.rows, ctx.id_col, ctx.site_url
     print(f"\n{'='*70}")
     print(f"🌍 Langue: {lang_name}")
     print(f"{'='*70}")
-    
-    # Charger le CSV de cette langue
-    df = load_csv_data(lang_dir)
-    if df is None:
-        print(f"⚠️  Impossible de charger le CSV pour {lang_code}")
-        return
-    
-    # Vérifier si la colonne youtube_url existe et la convertir en string
-    if 'youtube_url' not in df.columns:
-        df['youtube_url'] = ''
-    else:
-        # Convertir en string dès le début pour éviter les problèmes de type
-        df['youtube_url'] = df['youtube_url'].fillna('').astype(str)
-    
-    # Récupérer l'URL du site
-    site_url = get_site_url(lang_dir)
+
+    # Reporter dans le CSV les uploads d'un run précédent interrompu
+    apply_journal(lang_dir, lang_code, headers, rows)
+
     print(f"🌐 URL du site: {site_url}")
-    
-    # Chercher la colonne ID (peut être 'id' ou 'product_id')
-    id_col = 'id' if 'id' in df.columns else 'product_id'
-    if id_col not in df.columns:
-        print(f"⚠️  Colonne ID non trouvée dans le CSV (cherché 'id' ou 'product_id')")
-        return
-    
-    # Parcourir les produits
+
+    # Parcourir les produits : filtrer d'abord sur le tracking (en mémoire)
+    # avant de sonder le filesystem
+    valid_ids = [pid for pid in ((row.get(id_col) or '').strip() for row in rows) if pid]
+    # Test d'appartenance direct sur le dict des uploads : pas d'appel de
+    # fonction ni de f-string par produit
+    uploads = tracking_data.get('uploads', {})
+    key_prefix = lang_code + '_'
+    candidate_ids = [pid for pid in valid_ids if key_prefix + pid not in uploads]
+
+    # Les produits déjà uploadés sont comptés ici, sans repasse en fin de run
+    total_skipped += len(valid_ids) - len(candidate_ids)
+
+    # Un seul scandir de IMAGES_DIR pour écarter les produits sans dossier,
+    # au lieu d'un scandir raté par candidat manquant
+    product_dirs = list_product_folders()
+    candidate_folders = [(pid, product_dirs[pid]) for pid in candidate_ids
+                         if pid in product_dirs]
+
+    # Chercher une vidéo dans le dossier de chaque produit candidat.
     products_with_videos = []
-    for _, row in df.iterrows():
-        product_id = str(row.get(id_col, ''))
-        if not product_id:
-            continue
-        
-        # Vérifier si déjà uploadé pour cette langue
-        if is_already_uploaded(tracking_data, lang_code, product_id):
-            continue
-        
-        # Chercher une vidéo dans le dossier du produit
-        product_folder = IMAGES_DIR / product_id
-        video_file = find_video_in_folder(product_folder)
-        
-        if video_file:
-            products_with_videos.append((product_id, video_file))
-    
+    if DAILY_QUOTA is not None:
+        # Quota borné : sondage paresseux tronqué par islice, on s'arrête
+        # dès qu'on a de quoi remplir le quota du jour au lieu de sonder
+        # tout le catalogue
+        probed = ((pid, find_video_in_folder(folder)) for pid, folder in candidate_folders)
+        products_with_videos = list(itertools.islice(
+            ((pid, video_file) for pid, video_file in probed if video_file),
+            max(DAILY_QUOTA - uploads_today, 0)))
+    elif candidate_folders:
+        # Pas de quota : sondes filesystem en parallèle, chaque scandir
+        # bloque sur le disque et relâche le GIL, donc les threads
+        # recouvrent la latence des syscalls. ex.map préserve l'ordre.
+        with ThreadPoolExecutor(max_workers=min(32, len(candidate_folders))) as executor:
+            videos = executor.map(lambda folder: find_video_in_folder(folder),
+                                  (folder for _, folder in candidate_folders))
+            products_with_videos = [(pid, video_file)
+                                    for (pid, _), video_file in zip(candidate_folders, videos)
+                                    if video_file]
+
     print(f"📹 {len(products_with_videos)} vidéo(s) trouvée(s) pour {lang_code}")
+
+    # Authentifier YouTube uniquement s'il y a des vidéos à uploader
+    # (évite la lecture des credentials et un éventuel refresh de token
+    # HTTPS sur les runs où il n'y a rien à faire)
+    youtube = None
+    if products_with_videos:
+        print("\n🔐 Authentification YouTube...")
+        try:
+            youtube = get_authenticated_service()
+            print("✅ Authentification réussie")
+        except Exception as e:
+            print(f"❌ Erreur lors de l'authentification: {e}")
+            sys.exit(1)
     
     # Uploader les vidéos (dans la limite du quota)
     for product_id, video_file in products_with_videos:
-        # Vérifier le quota
-        if not can_upload_today(tracking_data):
-            if DAILY_QUOTA is not None:
-                print(f"\n⚠️  Quota quotidien atteint ({DAILY_QUOTA} vidéos)")
-                print("   Les vidéos restantes seront uploadées demain automatiquement.")
+        # Vérifier le quota (compteur local : pas de relecture du tracking)
+        if DAILY_QUOTA is not None and uploads_today >= DAILY_QUOTA:
+            print(f"\n⚠️  Quota quotidien atteint ({DAILY_QUOTA} vidéos)")
+            print("   Les vidéos restantes seront uploadées demain automatiquement.")
             break
         
-        print(f"\n📹 Produit {product_id}: {video_file.name}")
-        
+        vprint("", f"📹 Produit {product_id}: {video_file.name}")
+
         # Récupérer les métadonnées
-        title, description_short = get_product_metadata(df, product_id, lang_code)
+        title, description_short = get_product_metadata(headers, rows, product_id, lang_code)
         if not title:
-            print(f"  ⚠️  Titre non trouvé dans le CSV, vidéo ignorée")
+            vprint("  ⚠️  Titre non trouvé dans le CSV, vidéo ignorée")
             total_skipped += 1
             continue
         
@@ -644,30 +849,22 @@ def main():
             # Enregistrer dans le tracking
             record_upload(tracking_data, lang_code, product_id, youtube_url)
             
-            # Mettre à jour le CSV
-            id_col = 'id' if 'id' in df.columns else 'product_id'
-            # Trouver l'index du produit (convertir les deux en string pour la comparaison)
-            product_mask = df[id_col].astype(str) == str(product_id)
-            # Mettre à jour l'URL YouTube
-            df.loc[product_mask, 'youtube_url'] = youtube_url
-            # Sauvegarder immédiatement après chaque upload
-            save_csv_data(lang_dir, df)
+            # Journaliser l'upload ; le CSV sera réécrit une seule fois en fin de run
+            append_journal(lang_code, product_id, youtube_url)
             
             total_uploaded += 1
-            uploads_today = get_uploads_today(tracking_data)
+            uploads_today += 1
             if DAILY_QUOTA is not None:
-                print(f"  ✅ Upload réussi ({uploads_today}/{DAILY_QUOTA} aujourd'hui)")
+                vprint(f"  ✅ Upload réussi ({uploads_today}/{DAILY_QUOTA} aujourd'hui)")
             else:
-                print(f"  ✅ Upload réussi ({uploads_today} aujourd'hui)")
+                vprint(f"  ✅ Upload réussi ({uploads_today} aujourd'hui)")
         else:
             total_errors += 1
             print(f"  ❌ Échec de l'upload")
     
-    # Compter les vidéos ignorées (déjà uploadées)
-    skipped = sum(1 for pid, _ in products_with_videos 
-                 if is_already_uploaded(tracking_data, lang_code, pid))
-    total_skipped += skipped
-    
+    # Reporter les uploads du run dans le CSV (une seule réécriture)
+    apply_journal(lang_dir, lang_code, headers, rows)
+
     # Sauvegarder le tracking
     save_tracking(tracking_data)
     
@@ -678,14 +875,20 @@ def main():
     print(f"✅ Vidéos uploadées aujourd'hui: {total_uploaded}")
     print(f"⏭️  Vidéos ignorées (déjà uploadées): {total_skipped}")
     print(f"❌ Erreurs: {total_errors}")
-    uploads_today = get_uploads_today(tracking_data)
     if DAILY_QUOTA is not None:
         print(f"📊 Quota utilisé: {uploads_today}/{DAILY_QUOTA}")
     else:
         print(f"📊 Vidéos uploadées aujourd'hui: {uploads_today}")
     
-    # Vérifier s'il reste des vidéos à uploader pour cette langue
-    remaining_videos = check_remaining_videos(tracking_data, lang_dirs)
+    # Vérifier s'il reste des vidéos à uploader pour cette langue.
+    if DAILY_QUOTA is not None:
+        # La liste des vidéos a été tronquée au quota : recompter via la
+        # passe streaming (tracking à jour grâce à record_upload)
+        remaining_videos = check_remaining_videos(tracking_data, lang_dirs)
+    else:
+        # Déduit de la passe principale : pas de relecture du CSV ni du
+        # dossier images en fin de run
+        remaining_videos = len(products_with_videos) - total_uploaded
     if remaining_videos > 0:
         print(f"\n📹 Il reste {remaining_videos} vidéo(s) à uploader pour {lang_name}")
         print(f"💡 Le script sera relancé automatiquement demain à 9h00")